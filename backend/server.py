@@ -1,50 +1,269 @@
 from fastapi import FastAPI, APIRouter
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
 import os
 import logging
 from pathlib import Path
+from functools import lru_cache
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
-import uuid
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass
+import time
+from uuid_utils import uuid7
 from datetime import datetime
 import socketio
 import asyncio
+import orjson
+from redis import asyncio as aioredis
 
 ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
-
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-
-# Create Socket.IO server with custom path
-sio = socketio.AsyncServer(
-    cors_allowed_origins="*",
-    logger=True,
-    engineio_logger=True
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def get_settings() -> Dict[str, Any]:
+    """Load backend/.env on first use and return the app's settings"""
+    load_dotenv(ROOT_DIR / '.env')
+    return {
+        'mongo_url': os.environ['MONGO_URL'],
+        'db_name': os.environ['DB_NAME'],
+        # Optional, required to run more than one worker
+        'redis_url': os.environ.get('REDIS_URL'),
+        # Per-packet Socket.IO logging costs a log call per message per
+        # client, so it is only switched on with SIO_LOG=1
+        'sio_log': os.environ.get('SIO_LOG', '0') == '1'
+    }
+
+class ORJSONSerializer:
+    """json module replacement for Socket.IO packets backed by orjson"""
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        # orjson output is already compact, so separators are ignored
+        return orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC).decode()
 
-# Create the main app without a prefix
-app = FastAPI()
+    loads = staticmethod(orjson.loads)
+
+# Connections and servers, set up by create_app()
+client: Optional[AsyncIOMotorClient] = None
+db = None
+redis_client = None
+sio: Optional[socketio.AsyncServer] = None
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Store active rooms and participants
-active_rooms: Dict[str, Dict[str, Any]] = {}
-user_rooms: Dict[str, str] = {}  # socket_id -> room_id mapping
+# Participant media state, packed into one int per socket
+FLAG_VIDEO = 1
+FLAG_AUDIO = 2
+FLAG_SCREEN = 4
+DEFAULT_FLAGS = FLAG_VIDEO | FLAG_AUDIO
+
+@dataclass(slots=True)
+class ParticipantMeta:
+    """Per-socket participant details; room membership lives in sio.manager
+
+    Slotted, since one of these is kept for every connected user.
+    """
+    room_id: str
+    name: str
+    flags: int = DEFAULT_FLAGS
+
+    def view(self) -> Dict[str, Any]:
+        """Public view of a participant, as sent to clients"""
+        return {
+            'name': self.name,
+            'video_enabled': bool(self.flags & FLAG_VIDEO),
+            'audio_enabled': bool(self.flags & FLAG_AUDIO),
+            'screen_sharing': bool(self.flags & FLAG_SCREEN)
+        }
+
+# Store participant details. With Redis the details of every worker's
+# sockets are mirrored into shared hashes: room:{id} maps sid -> participant
+# JSON and user_rooms maps sid -> room id.
+sid_meta: Dict[str, ParticipantMeta] = {}  # socket_id -> participant
+USER_ROOMS_KEY = 'user_rooms'
+
+# Workers register under the Redis manager's host_id and list the sids they
+# host, so that the participants of a worker which died without shutting
+# down are purged by the others once its heartbeat key expires.
+WORKERS_KEY = 'workers'
+WORKER_TTL = 30
+HEARTBEAT_INTERVAL = 10
+heartbeat_task: Optional[asyncio.Task] = None
+
+def room_key(room_id: str) -> str:
+    return f'room:{room_id}'
+
+def worker_key(host_id: str) -> str:
+    return f'worker:{host_id}'
+
+def worker_sids_key(host_id: str) -> str:
+    return f'worker_sids:{host_id}'
+
+def room_members(room_id: str) -> List[str]:
+    """Socket ids on this worker that have joined a room"""
+    if '/' not in sio.manager.rooms:
+        return []
+    return [
+        sid for sid, _ in sio.manager.get_participants('/', room_id)
+        if sid in sid_meta and sid_meta[sid].room_id == room_id
+    ]
+
+async def room_participants(room_id: str) -> Dict[str, Dict[str, Any]]:
+    """Public views of everyone in a room, keyed by socket id"""
+    if redis_client is None:
+        return {sid: sid_meta[sid].view() for sid in room_members(room_id)}
+    entries = await redis_client.hgetall(room_key(room_id))
+    return {sid: orjson.loads(entry) for sid, entry in entries.items()}
+
+async def add_participant(sid: str, meta: ParticipantMeta) -> Dict[str, Dict[str, Any]]:
+    """Record a participant, returning everyone who was already in the room"""
+    if redis_client is None:
+        participants = {k: sid_meta[k].view() for k in room_members(meta.room_id) if k != sid}
+    else:
+        previous = sid_meta.get(sid)
+        # Read the room and update the shared keys in a single round-trip;
+        # MULTI/EXEC keeps concurrent joins from missing each other
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hgetall(room_key(meta.room_id))
+            pipe.hset(room_key(meta.room_id), sid, orjson.dumps(meta.view()))
+            if previous is not None and previous.room_id != meta.room_id:
+                pipe.hdel(room_key(previous.room_id), sid)
+            pipe.hset(USER_ROOMS_KEY, sid, meta.room_id)
+            pipe.sadd(worker_sids_key(sio.manager.host_id), sid)
+            entries = (await pipe.execute())[0]
+        participants = {k: orjson.loads(v) for k, v in entries.items() if k != sid}
+    sid_meta[sid] = meta
+    return participants
+
+async def remove_participant(sid: str) -> Optional[ParticipantMeta]:
+    """Forget a participant, returning their details if they were in a room"""
+    meta = sid_meta.pop(sid, None)
+    if meta is not None and redis_client is not None:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hdel(room_key(meta.room_id), sid)
+            pipe.hdel(USER_ROOMS_KEY, sid)
+            pipe.srem(worker_sids_key(sio.manager.host_id), sid)
+            await pipe.execute()
+    return meta
+
+async def _same_room(sid: str, target_id: str) -> bool:
+    """Whether two sockets are participants of the same room"""
+    meta = sid_meta.get(sid)
+    if meta is None:
+        return False
+    target = sid_meta.get(target_id)
+    if target is not None:
+        return target.room_id == meta.room_id
+    if redis_client is None:
+        return False
+    # The target may be connected to another worker
+    return await redis_client.hget(USER_ROOMS_KEY, target_id) == meta.room_id
+
+async def _set_flag(sid: str, mask: int, on: bool) -> Optional[ParticipantMeta]:
+    """Set or clear a media flag, returning the participant if they are in a room"""
+    meta = sid_meta.get(sid)
+    if meta is not None:
+        meta.flags = meta.flags | mask if on else meta.flags & ~mask
+        if redis_client is not None:
+            await redis_client.hset(room_key(meta.room_id), sid, orjson.dumps(meta.view()))
+    return meta
+
+async def purge_worker(host_id: str):
+    """Remove a worker's participants from the shared hashes and tell their rooms"""
+    # Whoever takes the worker off the registry does the purge, so each
+    # departure is announced once
+    if not await redis_client.srem(WORKERS_KEY, host_id):
+        return
+    sids = list(await redis_client.smembers(worker_sids_key(host_id)))
+    room_ids = await redis_client.hmget(USER_ROOMS_KEY, sids) if sids else []
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for sid, room_id in zip(sids, room_ids):
+            if room_id is not None:
+                pipe.hdel(room_key(room_id), sid)
+        if sids:
+            pipe.hdel(USER_ROOMS_KEY, *sids)
+        pipe.delete(worker_sids_key(host_id), worker_key(host_id))
+        await pipe.execute()
+    for sid, room_id in zip(sids, room_ids):
+        if room_id is not None:
+            await broadcast(room_id, 'user_left', {'user_id': sid})
+    if sids:
+        logger.info("Purged %d participants of worker %s", len(sids), host_id)
+
+async def reap_dead_workers():
+    """Purge every registered worker whose heartbeat has expired"""
+    host_ids = [h for h in await redis_client.smembers(WORKERS_KEY) if h != sio.manager.host_id]
+    if not host_ids:
+        return
+    beats = await redis_client.mget([worker_key(h) for h in host_ids])
+    for host_id, beat in zip(host_ids, beats):
+        if beat is None:
+            await purge_worker(host_id)
+
+async def republish_participants():
+    """Restore this worker's participants after another worker purged them"""
+    host_id = sio.manager.host_id
+    participants = list(sid_meta.items())
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for sid, meta in participants:
+            pipe.hset(room_key(meta.room_id), sid, orjson.dumps(meta.view()))
+            pipe.hset(USER_ROOMS_KEY, sid, meta.room_id)
+            pipe.sadd(worker_sids_key(host_id), sid)
+        await pipe.execute()
+    # Their rooms were told they left, so announce them again
+    for sid, meta in participants:
+        await broadcast(meta.room_id, 'user_joined', {
+            'user_id': sid,
+            'user_name': meta.name
+        }, skip_sid=sid)
+    if participants:
+        logger.warning("Restored %d participants after this worker was purged", len(participants))
+
+async def heartbeat(registered: bool):
+    """Refresh this worker's registration, then purge the dead workers"""
+    host_id = sio.manager.host_id
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.sadd(WORKERS_KEY, host_id)
+        pipe.set(worker_key(host_id), 1, ex=WORKER_TTL)
+        added = (await pipe.execute())[0]
+    if added and registered:
+        # Our heartbeat lapsed (Redis outage, stalled loop) and another
+        # worker purged us, although our clients are still connected
+        await republish_participants()
+    await reap_dead_workers()
+
+async def _worker_heartbeat():
+    registered = False
+    while True:
+        try:
+            await heartbeat(registered)
+            registered = True
+        except Exception:
+            logger.exception("Worker heartbeat failed")
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
 
 # Define Models
 class Room(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    # Time-ordered ids keep new rooms at the tail of the id index
+    id: str = Field(default_factory=lambda: str(uuid7()))
     name: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     participant_count: int = 0
 
+# Fields read back for Room responses
+ROOM_PROJECTION = {"_id": 0, "id": 1, "name": 1, "created_at": 1, "participant_count": 1}
+
 class RoomCreate(BaseModel):
     name: str
 
@@ -52,231 +271,587 @@ class JoinRoom(BaseModel):
     room_id: str
     user_name: str
 
+# Batched MongoDB writes
+MAX_BATCH = 500
+FLUSH_MS = 10
+EVENT_QUEUE_SIZE = 10000  # join/leave records held while Mongo is slow
+
+class AsyncRoomBatcher:
+    """Coalesce concurrent inserts into one bulk_write per flush tick"""
+
+    def __init__(self, collection, max_batch: int = MAX_BATCH, flush_ms: int = FLUSH_MS,
+                 max_queue: int = 0):
+        self.collection = collection
+        self.max_batch = max_batch
+        self.flush_interval = flush_ms / 1000
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._queue = None
+        self._task = None
+
+    async def start(self):
+        """Start the background flush loop"""
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush pending documents and stop the flush loop"""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        await self._queue.put(None)
+        await task
+
+    async def submit(self, document: Dict[str, Any]):
+        """Queue a document and wait until its batch has been written"""
+        if self._task is None:
+            raise RuntimeError(f"Batcher for {self.collection.name} is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((document, future))
+        return await future
+
+    def enqueue(self, document: Dict[str, Any]) -> bool:
+        """Queue a document without waiting for it to be written
+
+        Best-effort: the document is dropped if the batcher is stopped or
+        its queue is full.
+        """
+        if self._task is not None:
+            try:
+                self._queue.put_nowait((document, None))
+                return True
+            except asyncio.QueueFull:
+                pass
+        # Log once per run of drops; the next successful flush reports the total
+        if not self.dropped:
+            logger.warning(
+                "Batcher for %s is stopped or full, dropping documents", self.collection.name
+            )
+        self.dropped += 1
+        return False
+
+    async def _run(self):
+        running = True
+        while running:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Give concurrent submitters one flush tick to join this batch
+            if self._queue.qsize() < self.max_batch - 1:
+                await asyncio.sleep(self.flush_interval)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        failed = {}
+        try:
+            await self.collection.bulk_write(
+                [InsertOne(document) for document, _ in batch], ordered=False
+            )
+        except BulkWriteError as exc:
+            for error in exc.details.get('writeErrors', []):
+                failed[error['index']] = exc
+        except Exception as exc:
+            failed = {index: exc for index in range(len(batch))}
+        if failed:
+            logger.warning(
+                "Failed to write %d of %d documents to %s",
+                len(failed), len(batch), self.collection.name
+            )
+        elif self.dropped:
+            logger.warning(
+                "Dropped %d documents for %s while its queue was full",
+                self.dropped, self.collection.name
+            )
+            self.dropped = 0
+
+        for index, (_, future) in enumerate(batch):
+            if future is None or future.done():
+                continue
+            if index in failed:
+                future.set_exception(failed[index])
+            else:
+                future.set_result(None)
+
+room_batcher: Optional[AsyncRoomBatcher] = None
+event_batcher: Optional[AsyncRoomBatcher] = None  # join/leave history
+
+def record_room_event(event: str, room_id: str, sid: str, user_name: str):
+    """Queue a join/leave record for the next batched write"""
+    event_batcher.enqueue({
+        'event': event,
+        'room_id': room_id,
+        'user_id': sid,
+        'user_name': user_name,
+        'created_at': datetime.utcnow()
+    })
+
+# Short-lived caches for room lookups
+ROOM_CACHE_TTL = 2
+ROOMS_LIST_TTL = 1
+
+class TTLCache:
+    """Process-local cache whose entries expire a fixed time after being set"""
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: str, value: Any):
+        if key not in self._entries and len(self._entries) >= self.maxsize:
+            # Evict the oldest entry
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self):
+        self._entries.clear()
+
+room_cache = TTLCache(ROOM_CACHE_TTL)  # room_id -> room document
+rooms_list_cache = TTLCache(ROOMS_LIST_TTL, maxsize=1)  # serialized lobby list
+
+# Outbound Socket.IO messages, one bounded queue and writer task per client
+OUT_QUEUE_SIZE = 256
+ENGINEIO_BACKLOG = 64  # packets engine.io may hold for a client before the writer waits
+WRITER_BACKOFF = 0.05
+out_queues: Dict[str, asyncio.Queue] = {}
+out_writers: Dict[str, asyncio.Task] = {}
+
+def encode_event(event: str, payload: Dict[str, Any]):
+    """Encode an event packet for the default namespace"""
+    pkt = sio.packet_class(socketio.packet.EVENT, namespace='/', data=[event, payload])
+    return pkt.encode()
+
+async def _socket_writer(sid: str, queue: asyncio.Queue):
+    """Drain a client's queue, sending everything that piled up in one pass"""
+    eio_sid = sio.manager.eio_sid_from_sid(sid, '/')
+    while True:
+        messages = [await queue.get()]
+        while not queue.empty():
+            messages.append(queue.get_nowait())
+        for _, frame in messages:
+            # Packets with binary attachments encode to several frames
+            if isinstance(frame, list):
+                for part in frame:
+                    await sio.eio.send(eio_sid, part)
+            else:
+                await sio.eio.send(eio_sid, frame)
+        
+        # Engine.io buffers without limit, so hold off while a slow client
+        # still has a backlog there and let messages queue up here instead
+        socket = sio.eio.sockets.get(eio_sid)
+        while socket is not None and not socket.closed and socket.queue.qsize() > ENGINEIO_BACKLOG:
+            await asyncio.sleep(WRITER_BACKOFF)
+
+def open_queue(sid: str):
+    """Create the outbound queue and writer task for a new client"""
+    queue = asyncio.Queue(maxsize=OUT_QUEUE_SIZE)
+    out_queues[sid] = queue
+    out_writers[sid] = asyncio.create_task(_socket_writer(sid, queue))
+
+def close_queue(sid: str):
+    """Drop a client's outbound queue and stop its writer task"""
+    out_queues.pop(sid, None)
+    writer = out_writers.pop(sid, None)
+    if writer is not None:
+        writer.cancel()
+
+def _drop_oldest(queue: asyncio.Queue, event: str) -> bool:
+    """Remove the oldest queued message for an event, if there is one"""
+    messages = []
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    dropped = False
+    for message in messages:
+        if not dropped and message[0] == event:
+            dropped = True
+            continue
+        queue.put_nowait(message)
+    return dropped
+
+def _enqueue(queue: asyncio.Queue, event: str, frame) -> bool:
+    """Queue a frame, returning False if the client is too far behind"""
+    try:
+        queue.put_nowait((event, frame))
+        return True
+    except asyncio.QueueFull:
+        pass
+    # ICE candidates are lossy by design, so the stalest one can go
+    if event == 'webrtc_ice_candidate' and _drop_oldest(queue, event):
+        queue.put_nowait((event, frame))
+        return True
+    return False
+
+async def _drop_slow_client(sid: str):
+    logger.warning("Outbound queue for %s is full, disconnecting", sid)
+    close_queue(sid)
+    await sio.disconnect(sid)
+
+async def emit_to(sid: str, event: str, payload: Dict[str, Any]):
+    """Queue an event for a single client"""
+    queue = out_queues.get(sid)
+    if queue is not None:
+        if not _enqueue(queue, event, encode_event(event, payload)):
+            await _drop_slow_client(sid)
+    elif redis_client is not None:
+        # The client may be connected to another worker
+        await sio.emit(event, payload, room=sid)
+
+async def deliver_local(room, event: str, payload: Dict[str, Any], skip_sid=None):
+    """Queue an event for this worker's clients in a room, encoding it only once"""
+    if '/' not in sio.manager.rooms:
+        return
+    if not isinstance(skip_sid, list):
+        skip_sid = [skip_sid]
+    frame = None
+    slow = []
+    for sid, _ in sio.manager.get_participants('/', room):
+        queue = out_queues.get(sid)
+        if sid in skip_sid or queue is None:
+            continue
+        if frame is None:
+            frame = encode_event(event, payload)
+        if not _enqueue(queue, event, frame):
+            slow.append(sid)
+    for sid in slow:
+        await _drop_slow_client(sid)
+
+async def broadcast(room_id: str, event: str, payload: Dict[str, Any], skip_sid: str = None):
+    """Queue an event for every client in a room"""
+    await deliver_local(room_id, event, payload, skip_sid)
+    if redis_client is not None:
+        # Rooms span workers, so publish the event for the other workers too
+        await sio.emit(event, payload, room=room_id, skip_sid=skip_sid)
+
+class QueuedRedisManager(socketio.AsyncRedisManager):
+    """Redis manager that delivers events to local clients through their queues
+
+    Without this, events arriving over pub/sub would be written straight to
+    engine.io and could overtake messages already queued for the same client.
+    """
+
+    async def _handle_emit(self, message):
+        if message.get('callback') is not None or message.get('namespace') != '/':
+            return await super()._handle_emit(message)
+        if message.get('host_id') == self.host_id:
+            # Our own events were already queued locally by broadcast/emit_to
+            return
+        await deliver_local(message.get('room'), message['event'], message['data'],
+                            message.get('skip_sid'))
+
 # Socket.IO Events
-@sio.event
+CONNECTED_MSG = {'message': 'Connected successfully'}
+connected_frame = None  # encoded on first connect, once sio exists
+
 async def connect(sid, environ):
-    print(f"Client {sid} connected")
-    await sio.emit('connected', {'message': 'Connected successfully'}, room=sid)
+    global connected_frame
+    logger.debug("Client %s connected", sid)
+    open_queue(sid)
+    if connected_frame is None:
+        connected_frame = encode_event('connected', CONNECTED_MSG)
+    # A fresh queue is empty, so this cannot fail
+    _enqueue(out_queues[sid], 'connected', connected_frame)
 
-@sio.event
 async def disconnect(sid):
-    print(f"Client {sid} disconnected")
+    logger.debug("Client %s disconnected", sid)
+    close_queue(sid)
     
     # Remove user from room if they were in one
-    if sid in user_rooms:
-        room_id = user_rooms[sid]
-        if room_id in active_rooms and sid in active_rooms[room_id]['participants']:
-            active_rooms[room_id]['participants'].pop(sid)
-            active_rooms[room_id]['participant_count'] -= 1
-            
-            # Notify other participants
-            await sio.emit('user_left', {'user_id': sid}, room=room_id)
-            
-            # Remove room if empty
-            if active_rooms[room_id]['participant_count'] == 0:
-                active_rooms.pop(room_id)
-        
-        user_rooms.pop(sid)
+    meta = await remove_participant(sid)
+    
+    # Notify other participants
+    if meta is not None:
+        record_room_event('leave', meta.room_id, sid, meta.name)
+        await broadcast(meta.room_id, 'user_left', {'user_id': sid}, skip_sid=sid)
 
-@sio.event
 async def join_room(sid, data):
     room_id = data['room_id']
     user_name = data['user_name']
     
-    # Create room if it doesn't exist
-    if room_id not in active_rooms:
-        active_rooms[room_id] = {
-            'participants': {},
-            'participant_count': 0,
-            'created_at': datetime.utcnow()
-        }
-    
-    # Add user to room
-    active_rooms[room_id]['participants'][sid] = {
-        'name': user_name,
-        'video_enabled': True,
-        'audio_enabled': True,
-        'screen_sharing': False
-    }
-    active_rooms[room_id]['participant_count'] += 1
-    user_rooms[sid] = room_id
+    previous = sid_meta.get(sid)
     
-    # Join socket room
+    # Join socket room first, so that broadcasts from anyone who joins
+    # after us reach us
     await sio.enter_room(sid, room_id)
     
-    # Send current participants to new user
-    participants = {
-        k: v for k, v in active_rooms[room_id]['participants'].items() 
-        if k != sid
-    }
-    await sio.emit('room_joined', {
+    # Add user to room, collecting the current participants for them
+    participants = await add_participant(sid, ParticipantMeta(room_id=room_id, name=user_name))
+    
+    if previous is not None and previous.room_id != room_id:
+        # Moving rooms: stop receiving the old room's events and tell it we left
+        await sio.leave_room(sid, previous.room_id)
+        record_room_event('leave', previous.room_id, sid, previous.name)
+        await broadcast(previous.room_id, 'user_left', {'user_id': sid}, skip_sid=sid)
+    
+    record_room_event('join', room_id, sid, user_name)
+    
+    await emit_to(sid, 'room_joined', {
         'room_id': room_id,
         'participants': participants
-    }, room=sid)
+    })
     
     # Notify other participants
-    await sio.emit('user_joined', {
+    await broadcast(room_id, 'user_joined', {
         'user_id': sid,
         'user_name': user_name
-    }, room=room_id, skip_sid=sid)
+    }, skip_sid=sid)
 
-@sio.event
 async def webrtc_offer(sid, data):
     """Handle WebRTC offer"""
     target_id = data['target_id']
     offer = data['offer']
     
-    await sio.emit('webrtc_offer', {
+    # Drop relays to peers that left or are in another room
+    if not await _same_room(sid, target_id):
+        return
+    
+    await emit_to(target_id, 'webrtc_offer', {
         'from_id': sid,
         'offer': offer
-    }, room=target_id)
+    })
 
-@sio.event
 async def webrtc_answer(sid, data):
     """Handle WebRTC answer"""
     target_id = data['target_id']
     answer = data['answer']
     
-    await sio.emit('webrtc_answer', {
+    # Drop relays to peers that left or are in another room
+    if not await _same_room(sid, target_id):
+        return
+    
+    await emit_to(target_id, 'webrtc_answer', {
         'from_id': sid,
         'answer': answer
-    }, room=target_id)
+    })
 
-@sio.event
 async def webrtc_ice_candidate(sid, data):
     """Handle ICE candidates"""
     target_id = data['target_id']
     candidate = data['candidate']
     
-    await sio.emit('webrtc_ice_candidate', {
+    # Drop relays to peers that left or are in another room
+    if not await _same_room(sid, target_id):
+        return
+    
+    await emit_to(target_id, 'webrtc_ice_candidate', {
         'from_id': sid,
         'candidate': candidate
-    }, room=target_id)
+    })
 
-@sio.event
 async def toggle_video(sid, data):
     """Toggle video on/off"""
     video_enabled = data['enabled']
+    meta = await _set_flag(sid, FLAG_VIDEO, video_enabled)
     
-    if sid in user_rooms:
-        room_id = user_rooms[sid]
-        if room_id in active_rooms and sid in active_rooms[room_id]['participants']:
-            active_rooms[room_id]['participants'][sid]['video_enabled'] = video_enabled
-            
-            # Notify other participants
-            await sio.emit('user_video_toggle', {
-                'user_id': sid,
-                'enabled': video_enabled
-            }, room=room_id, skip_sid=sid)
-
-@sio.event
+    if meta is not None:
+        # Notify other participants
+        await broadcast(meta.room_id, 'user_video_toggle', {
+            'user_id': sid,
+            'enabled': video_enabled
+        }, skip_sid=sid)
+
 async def toggle_audio(sid, data):
     """Toggle audio on/off"""
     audio_enabled = data['enabled']
+    meta = await _set_flag(sid, FLAG_AUDIO, audio_enabled)
     
-    if sid in user_rooms:
-        room_id = user_rooms[sid]
-        if room_id in active_rooms and sid in active_rooms[room_id]['participants']:
-            active_rooms[room_id]['participants'][sid]['audio_enabled'] = audio_enabled
-            
-            # Notify other participants
-            await sio.emit('user_audio_toggle', {
-                'user_id': sid,
-                'enabled': audio_enabled
-            }, room=room_id, skip_sid=sid)
-
-@sio.event
+    if meta is not None:
+        # Notify other participants
+        await broadcast(meta.room_id, 'user_audio_toggle', {
+            'user_id': sid,
+            'enabled': audio_enabled
+        }, skip_sid=sid)
+
 async def start_screen_share(sid, data):
     """Start screen sharing"""
-    if sid in user_rooms:
-        room_id = user_rooms[sid]
-        if room_id in active_rooms and sid in active_rooms[room_id]['participants']:
-            active_rooms[room_id]['participants'][sid]['screen_sharing'] = True
-            
-            # Notify other participants
-            await sio.emit('user_screen_share_start', {
-                'user_id': sid
-            }, room=room_id, skip_sid=sid)
-
-@sio.event
+    meta = await _set_flag(sid, FLAG_SCREEN, True)
+    
+    if meta is not None:
+        # Notify other participants
+        await broadcast(meta.room_id, 'user_screen_share_start', {
+            'user_id': sid
+        }, skip_sid=sid)
+
 async def stop_screen_share(sid, data):
     """Stop screen sharing"""
-    if sid in user_rooms:
-        room_id = user_rooms[sid]
-        if room_id in active_rooms and sid in active_rooms[room_id]['participants']:
-            active_rooms[room_id]['participants'][sid]['screen_sharing'] = False
-            
-            # Notify other participants
-            await sio.emit('user_screen_share_stop', {
-                'user_id': sid
-            }, room=room_id, skip_sid=sid)
+    meta = await _set_flag(sid, FLAG_SCREEN, False)
+    
+    if meta is not None:
+        # Notify other participants
+        await broadcast(meta.room_id, 'user_screen_share_stop', {
+            'user_id': sid
+        }, skip_sid=sid)
 
 # API Routes
+ROOT_RESPONSE = Response(b'{"message":"WatchTogether API"}', media_type="application/json")
+
 @api_router.get("/")
 async def root():
-    return {"message": "WatchTogether API"}
+    return ROOT_RESPONSE
 
 @api_router.post("/rooms", response_model=Room)
 async def create_room(room_data: RoomCreate):
     """Create a new room"""
-    room = Room(name=room_data.name)
+    # The name was validated by RoomCreate and the rest are defaults
+    room = Room.model_construct(name=room_data.name)
     
-    # Store in database
-    await db.rooms.insert_one(room.dict())
+    # Store in database (batched with concurrent creates); model_dump hands
+    # the batcher its own dict, so the _id Mongo adds never touches the model
+    await room_batcher.submit(room.model_dump())
+    rooms_list_cache.clear()
     
     return room
 
 @api_router.get("/rooms", response_model=List[Room])
 async def get_rooms():
     """Get all available rooms"""
-    rooms = await db.rooms.find().to_list(100)
-    return [Room(**room) for room in rooms]
+    body = rooms_list_cache.get('rooms')
+    if body is None:
+        # Newest rooms first, served from the created_at index; ids alone
+        # would not do, as legacy uuid4 ids sort above the uuid7 ones
+        rooms = await db.rooms.find({}, ROOM_PROJECTION).sort("created_at", -1).to_list(100)
+        # Documents were validated on the way in, so serialize them as-is
+        body = orjson.dumps(rooms)
+        rooms_list_cache.set('rooms', body)
+    return Response(content=body, media_type="application/json")
 
 @api_router.get("/rooms/{room_id}")
 async def get_room(room_id: str):
     """Get room details and current participants"""
-    room = await db.rooms.find_one({"id": room_id})
+    room = room_cache.get(room_id)
+    if room is None:
+        room = await db.rooms.find_one({"id": room_id}, ROOM_PROJECTION)
+        if room:
+            room_cache.set(room_id, room)
     if not room:
         return {"error": "Room not found"}
     
-    participants = []
-    if room_id in active_rooms:
-        participants = [
-            {"id": k, **v} for k, v in active_rooms[room_id]['participants'].items()
-        ]
+    participants = [
+        {"id": k, **v} for k, v in (await room_participants(room_id)).items()
+    ]
     
     return {
-        "room": Room(**room),
+        "room": Room.model_construct(**room),
         "participants": participants,
         "participant_count": len(participants)
     }
 
-# Include the router in the main app
-app.include_router(api_router)
+# Socket.IO handlers, registered under their function names
+SOCKET_HANDLERS = [
+    connect,
+    disconnect,
+    join_room,
+    webrtc_offer,
+    webrtc_answer,
+    webrtc_ice_candidate,
+    toggle_video,
+    toggle_audio,
+    start_screen_share,
+    stop_screen_share
+]
 
 origins = [
     "https://watch-party-sigma.vercel.app", 
     "http://localhost:3000",  
 ]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=origins,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+async def create_indexes():
+    await db.rooms.create_index("id", unique=True)
+    await db.rooms.create_index("created_at")
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+async def start_room_batcher():
+    await room_batcher.start()
+    await event_batcher.start()
+
+async def start_heartbeat():
+    global heartbeat_task
+    heartbeat_task = asyncio.create_task(_worker_heartbeat())
+
+async def stop_heartbeat():
+    """Stop the heartbeat and hand this worker's participants back"""
+    if heartbeat_task is not None:
+        heartbeat_task.cancel()
+    await purge_worker(sio.manager.host_id)
 
-@app.on_event("shutdown")
 async def shutdown_db_client():
+    await room_batcher.stop()
+    await event_batcher.stop()
     client.close()
+    if redis_client is not None:
+        await redis_client.aclose()
+
+def create_app():
+    """Connect to the backing services and build the ASGI app"""
+    global client, db, redis_client, sio, room_batcher, event_batcher
+    settings = get_settings()
+    
+    # MongoDB connection
+    client = AsyncIOMotorClient(settings['mongo_url'])
+    db = client[settings['db_name']]
+    room_batcher = AsyncRoomBatcher(db.rooms)
+    event_batcher = AsyncRoomBatcher(db.room_events, max_queue=EVENT_QUEUE_SIZE)
+    
+    redis_url = settings['redis_url']
+    redis_client = aioredis.from_url(redis_url, decode_responses=True) if redis_url else None
+    
+    sio_logger = logging.getLogger('sio')
+    sio_logger.setLevel(logging.INFO if settings['sio_log'] else logging.WARNING)
+    
+    # Create Socket.IO server with custom path
+    sio = socketio.AsyncServer(
+        client_manager=QueuedRedisManager(redis_url) if redis_url else None,
+        cors_allowed_origins="*",
+        json=ORJSONSerializer,
+        logger=sio_logger,
+        engineio_logger=settings['sio_log']
+    )
+    for handler in SOCKET_HANDLERS:
+        sio.on(handler.__name__, handler)
+    
+    # Create the main app without a prefix
+    app = FastAPI(default_response_class=ORJSONResponse)
+    
+    # Include the router in the main app
+    app.include_router(api_router)
+    
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=origins,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    app.add_event_handler("startup", create_indexes)
+    app.add_event_handler("startup", start_room_batcher)
+    if redis_url:
+        app.add_event_handler("startup", start_heartbeat)
+        app.add_event_handler("shutdown", stop_heartbeat)
+    app.add_event_handler("shutdown", shutdown_db_client)
+    
+    # Mount Socket.IO with proper ASGI integration
+    return socketio.ASGIApp(sio, other_asgi_app=app)
 
-# Mount Socket.IO with proper ASGI integration
-app = socketio.ASGIApp(sio, other_asgi_app=app)
+def __getattr__(name):
+    # Keeps `uvicorn server:app` working while importing the module stays
+    # free of side effects; the app is built on first access
+    if name == 'app':
+        app = globals()['app'] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
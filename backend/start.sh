@@ -0,0 +1,35 @@
+#!/bin/sh
+# Start the WatchTogether backend.
+#
+# Signaling traffic is many tiny websocket messages, so run on uvloop with
+# the httptools parser instead of the pure-Python defaults.
+#
+# Each websocket holds a file descriptor; raise the soft limit as far as the
+# host allows. The listen backlog is also capped by the kernel's
+# net.core.somaxconn, which has to be raised on the host (sysctl) to match.
+#
+# Per-packet Socket.IO logging is off by default; set SIO_LOG=1 to debug.
+#
+# This runs a single worker. To scale out, set REDIS_URL so that rooms and
+# participant state are shared, and start one copy per port behind a load
+# balancer with sticky sessions. Socket.IO clients start on long-polling,
+# and every request of a session has to reach the worker that issued it:
+#   REDIS_URL=redis://redis:6379/0 PORT=8001 ./start.sh
+#   REDIS_URL=redis://redis:6379/0 PORT=8002 ./start.sh
+#
+# Behind gunicorn (e.g. Heroku-style deploys) use the uvicorn worker, which
+# picks up uvloop and httptools automatically when they are installed:
+#   gunicorn server:app -k uvicorn.workers.UvicornWorker --workers 1
+set -e
+
+cd "$(dirname "$0")"
+
+ulimit -n 1048576 2>/dev/null || ulimit -n "$(ulimit -Hn)" 2>/dev/null || true
+
+exec uvicorn server:create_app --factory \
+    --host 0.0.0.0 \
+    --port "${PORT:-8001}" \
+    --loop uvloop \
+    --http httptools \
+    --ws websockets \
+    --backlog "${BACKLOG:-4096}"
@@ -1,4 +1,5 @@
-import requests
+import asyncio
+import httpx
 import sys
 import json
 from datetime import datetime
@@ -10,61 +11,65 @@ class WatchTogetherAPITester:
         self.tests_run = 0
         self.tests_passed = 0
         self.created_rooms = []
+        self.client = None
 
-    def run_test(self, name, method, endpoint, expected_status, data=None, headers=None):
+    async def __aenter__(self):
+        # One multiplexed HTTP/2 connection shared by all concurrent tests
+        self.client = httpx.AsyncClient(http2=True, timeout=10)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+
+    async def run_test(self, name, method, endpoint, expected_status, data=None, headers=None):
         """Run a single API test"""
         url = f"{self.base_url}/{endpoint}"
         if headers is None:
             headers = {'Content-Type': 'application/json'}
 
         self.tests_run += 1
-        print(f"\n🔍 Testing {name}...")
-        print(f"   URL: {url}")
-        
+        # Tests run concurrently, so buffer output and print it in one go
+        log = [f"\n🔍 Testing {name}...", f"   URL: {url}"]
+
         try:
-            if method == 'GET':
-                response = requests.get(url, headers=headers, timeout=10)
-            elif method == 'POST':
-                response = requests.post(url, json=data, headers=headers, timeout=10)
-            elif method == 'PUT':
-                response = requests.put(url, json=data, headers=headers, timeout=10)
-            elif method == 'DELETE':
-                response = requests.delete(url, headers=headers, timeout=10)
-
-            print(f"   Status Code: {response.status_code}")
+            response = await self.client.request(method, url, json=data, headers=headers)
+
+            log.append(f"   Status Code: {response.status_code}")
             
             success = response.status_code == expected_status
             if success:
                 self.tests_passed += 1
-                print(f"✅ Passed - Status: {response.status_code}")
+                log.append(f"✅ Passed - Status: {response.status_code}")
                 try:
                     response_data = response.json()
-                    print(f"   Response: {json.dumps(response_data, indent=2)}")
+                    log.append(f"   Response: {json.dumps(response_data, indent=2)}")
                     return True, response_data
                 except:
                     return True, response.text
             else:
-                print(f"❌ Failed - Expected {expected_status}, got {response.status_code}")
+                log.append(f"❌ Failed - Expected {expected_status}, got {response.status_code}")
                 try:
                     error_data = response.json()
-                    print(f"   Error Response: {json.dumps(error_data, indent=2)}")
+                    log.append(f"   Error Response: {json.dumps(error_data, indent=2)}")
                 except:
-                    print(f"   Error Response: {response.text}")
+                    log.append(f"   Error Response: {response.text}")
                 return False, {}
 
-        except requests.exceptions.Timeout:
-            print(f"❌ Failed - Request timeout")
+        except httpx.TimeoutException:
+            log.append(f"❌ Failed - Request timeout")
             return False, {}
-        except requests.exceptions.ConnectionError:
-            print(f"❌ Failed - Connection error")
+        except httpx.ConnectError:
+            log.append(f"❌ Failed - Connection error")
             return False, {}
         except Exception as e:
-            print(f"❌ Failed - Error: {str(e)}")
+            log.append(f"❌ Failed - Error: {str(e)}")
             return False, {}
+        finally:
+            print("\n".join(log))
 
-    def test_api_root(self):
+    async def test_api_root(self):
         """Test API root endpoint"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "API Root",
             "GET",
             "api/",
@@ -72,9 +77,9 @@ class WatchTogetherAPITester:
         )
         return success
 
-    def test_create_room(self, room_name):
+    async def test_create_room(self, room_name):
         """Test room creation"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Create Room",
             "POST",
             "api/rooms",
@@ -86,9 +91,9 @@ class WatchTogetherAPITester:
             return response['id']
         return None
 
-    def test_get_rooms(self):
+    async def test_get_rooms(self):
         """Test getting all rooms"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Get All Rooms",
             "GET",
             "api/rooms",
@@ -96,9 +101,9 @@ class WatchTogetherAPITester:
         )
         return success, response
 
-    def test_get_room_details(self, room_id):
+    async def test_get_room_details(self, room_id):
         """Test getting specific room details"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Get Room Details",
             "GET",
             f"api/rooms/{room_id}",
@@ -106,10 +111,10 @@ class WatchTogetherAPITester:
         )
         return success, response
 
-    def test_get_nonexistent_room(self):
+    async def test_get_nonexistent_room(self):
         """Test getting non-existent room"""
         fake_room_id = "nonexistent-room-id-12345"
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Get Non-existent Room",
             "GET",
             f"api/rooms/{fake_room_id}",
@@ -117,9 +122,9 @@ class WatchTogetherAPITester:
         )
         return success, response
 
-    def test_invalid_room_creation(self):
+    async def test_invalid_room_creation(self):
         """Test creating room with invalid data"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Create Room with Invalid Data",
             "POST",
             "api/rooms",
@@ -128,47 +133,41 @@ class WatchTogetherAPITester:
         )
         return success
 
-def main():
+async def main():
     print("🚀 Starting WatchTogether API Tests")
     print("=" * 50)
     
     # Setup
-    tester = WatchTogetherAPITester()
-    test_room_name = f"Test Room {datetime.now().strftime('%H:%M:%S')}"
-
-    # Test API Root
-    print("\n📋 Testing Basic API Endpoints")
-    tester.test_api_root()
-
-    # Test Room Creation
-    print("\n🏠 Testing Room Management")
-    room_id = tester.test_create_room(test_room_name)
-    
-    if room_id:
-        print(f"   Created room ID: {room_id}")
-        
-        # Test getting all rooms
-        success, rooms = tester.test_get_rooms()
-        if success:
-            print(f"   Found {len(rooms)} total rooms")
-        
-        # Test getting specific room details
-        success, room_details = tester.test_get_room_details(room_id)
-        if success:
-            print(f"   Room details retrieved successfully")
-    else:
-        print("   ❌ Room creation failed, skipping dependent tests")
-
-    # Test edge cases
-    print("\n🔍 Testing Edge Cases")
-    tester.test_get_nonexistent_room()
-    tester.test_invalid_room_creation()
+    async with WatchTogetherAPITester() as tester:
+        test_room_name = f"Test Room {datetime.now().strftime('%H:%M:%S')}"
+
+        # Independent tests run concurrently; only the room lookups need a created room
+        print("\n📋 Testing Basic API Endpoints, Room Creation and Edge Cases")
+        _, room_id, _, _, room_id_2 = await asyncio.gather(
+            tester.test_api_root(),
+            tester.test_create_room(test_room_name),
+            tester.test_get_nonexistent_room(),
+            tester.test_invalid_room_creation(),
+            tester.test_create_room(f"Second Test Room {datetime.now().strftime('%H:%M:%S')}"),
+        )
 
-    # Test another room creation to verify multiple rooms
-    print("\n🏠 Testing Multiple Room Creation")
-    room_id_2 = tester.test_create_room(f"Second Test Room {datetime.now().strftime('%H:%M:%S')}")
-    if room_id_2:
-        print(f"   Created second room ID: {room_id_2}")
+        if room_id:
+            print(f"   Created room ID: {room_id}")
+        if room_id_2:
+            print(f"   Created second room ID: {room_id_2}")
+
+        print("\n🏠 Testing Room Management")
+        if room_id:
+            (success, rooms), (details_ok, room_details) = await asyncio.gather(
+                tester.test_get_rooms(),
+                tester.test_get_room_details(room_id),
+            )
+            if success:
+                print(f"   Found {len(rooms)} total rooms")
+            if details_ok:
+                print(f"   Room details retrieved successfully")
+        else:
+            print("   ❌ Room creation failed, skipping dependent tests")
 
     # Final summary
     print("\n" + "=" * 50)
@@ -190,4 +189,4 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(asyncio.run(main()))
\ No newline at end of file
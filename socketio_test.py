@@ -5,12 +5,18 @@ import sys
 import time
 from datetime import datetime
 
+# Upper bounds only; waits return as soon as the server answers
+CONNECT_TIMEOUT = 5
+JOIN_TIMEOUT = 5
+
 class SocketIOTester:
     def __init__(self, server_url="https://e70d0026-f720-4080-93f1-c644fd5756ae.preview.emergentagent.com"):
         self.server_url = server_url
         self.sio = socketio.AsyncClient()
         self.connected = False
         self.room_joined = False
+        self.connected_evt = asyncio.Event()
+        self.room_joined_evt = asyncio.Event()
         self.test_results = []
         self.setup_event_handlers()
 
@@ -19,12 +25,14 @@ class SocketIOTester:
         async def connect():
             print("✅ Socket.IO connection established")
             self.connected = True
+            self.connected_evt.set()
             self.test_results.append(("Connection", True, "Successfully connected to server"))
 
         @self.sio.event
         async def disconnect():
             print("🔌 Socket.IO disconnected")
             self.connected = False
+            self.connected_evt.clear()
 
         @self.sio.event
         async def connected(data):
@@ -35,6 +43,7 @@ class SocketIOTester:
         async def room_joined(data):
             print(f"🏠 Room joined successfully: {data}")
             self.room_joined = True
+            self.room_joined_evt.set()
             self.test_results.append(("Room Join", True, f"Joined room: {data.get('room_id')}"))
 
         @self.sio.event
@@ -47,13 +56,20 @@ class SocketIOTester:
             print(f"❌ Connection error: {data}")
             self.test_results.append(("Connection", False, f"Error: {data}"))
 
+    async def _wait_for(self, evt, timeout):
+        """Wait until a handler sets evt; the caller checks state on timeout"""
+        try:
+            await asyncio.wait_for(evt.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
     async def test_connection(self):
         """Test basic Socket.IO connection"""
         print("\n🔍 Testing Socket.IO Connection...")
         try:
             await self.sio.connect(self.server_url)
-            await asyncio.sleep(2)  # Wait for connection to establish
-            
+            await self._wait_for(self.connected_evt, CONNECT_TIMEOUT)
+
             if self.connected:
                 print("✅ Connection test passed")
                 return True
@@ -75,14 +91,15 @@ class SocketIOTester:
 
         try:
             # Emit join_room event
+            self.room_joined_evt.clear()
             await self.sio.emit('join_room', {
                 'room_id': room_id,
                 'user_name': user_name
             })
             
             # Wait for response
-            await asyncio.sleep(3)
-            
+            await self._wait_for(self.room_joined_evt, JOIN_TIMEOUT)
+
             if self.room_joined:
                 print("✅ Room join test passed")
                 return True
@@ -107,12 +124,10 @@ class SocketIOTester:
         try:
             # Test toggle_video event
             await self.sio.emit('toggle_video', {'enabled': False})
-            await asyncio.sleep(1)
-            
+
             # Test toggle_audio event  
             await self.sio.emit('toggle_audio', {'enabled': False})
-            await asyncio.sleep(1)
-            
+
             print("✅ WebRTC events sent successfully (no errors)")
             self.test_results.append(("WebRTC Events", True, "Events sent without errors"))
             return True
@@ -0,0 +1,32 @@
+"""Stand-ins for the Socket.IO server the backend module talks to"""
+
+
+class FakeManager:
+    def __init__(self, rooms, host_id):
+        self.rooms = {'/': rooms}
+        self.host_id = host_id
+
+    def get_participants(self, namespace, room):
+        for sid in self.rooms[namespace].get(room, []):
+            yield sid, f'eio-{sid}'
+
+
+class FakeServer:
+    def __init__(self, rooms=None, host_id='here'):
+        self.manager = FakeManager(rooms or {}, host_id)
+        self.disconnected = []
+        self.emitted = []
+
+    async def disconnect(self, sid):
+        self.disconnected.append(sid)
+
+    async def emit(self, event, data, room=None, skip_sid=None):
+        self.emitted.append((event, data, room))
+
+    async def enter_room(self, sid, room):
+        members = self.manager.rooms['/'].setdefault(room, [])
+        if sid not in members:
+            members.append(sid)
+
+    async def leave_room(self, sid, room):
+        self.manager.rooms['/'].get(room, []).remove(sid)
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError
+
+import server
+
+
+class FakeCollection:
+    name = 'fake'
+
+    def __init__(self, error=None):
+        self.error = error
+        self.batches = []
+
+    async def bulk_write(self, requests, ordered=True):
+        self.batches.append([request._doc for request in requests])
+        if self.error is not None:
+            raise self.error
+
+
+async def submit_all(batcher, documents):
+    await batcher.start()
+    try:
+        return await asyncio.gather(
+            *(batcher.submit(document) for document in documents),
+            return_exceptions=True
+        )
+    finally:
+        await batcher.stop()
+
+
+def test_concurrent_submits_share_one_batch():
+    collection = FakeCollection()
+    batcher = server.AsyncRoomBatcher(collection)
+    results = asyncio.run(submit_all(batcher, [{'n': 1}, {'n': 2}, {'n': 3}]))
+    assert results == [None, None, None]
+    assert collection.batches == [[{'n': 1}, {'n': 2}, {'n': 3}]]
+
+
+def test_bulk_write_errors_fail_only_their_documents():
+    error = BulkWriteError({
+        'writeErrors': [{'index': 1, 'code': 11000, 'errmsg': 'duplicate key'}],
+        'nInserted': 2
+    })
+    batcher = server.AsyncRoomBatcher(FakeCollection(error))
+    results = asyncio.run(submit_all(batcher, [{'n': 1}, {'n': 2}, {'n': 3}]))
+    assert results[0] is None
+    assert results[1] is error
+    assert results[2] is None
+
+
+def test_other_errors_fail_the_whole_batch():
+    error = ServerSelectionTimeoutError('no servers')
+    batcher = server.AsyncRoomBatcher(FakeCollection(error))
+    results = asyncio.run(submit_all(batcher, [{'n': 1}, {'n': 2}]))
+    assert results == [error, error]
+
+
+def test_batches_are_capped_at_max_batch():
+    collection = FakeCollection()
+    batcher = server.AsyncRoomBatcher(collection, max_batch=2)
+    asyncio.run(submit_all(batcher, [{'n': n} for n in range(5)]))
+    assert [len(batch) for batch in collection.batches] == [2, 2, 1]
+
+
+def test_enqueue_drops_documents_when_full():
+    collection = FakeCollection()
+    batcher = server.AsyncRoomBatcher(collection, max_queue=1)
+
+    async def run():
+        await batcher.start()
+        assert batcher.enqueue({'n': 1})
+        assert not batcher.enqueue({'n': 2})
+        assert batcher.dropped == 1
+        await batcher.stop()
+
+    asyncio.run(run())
+    assert collection.batches == [[{'n': 1}]]
+    # The flush reports the drops and starts counting afresh
+    assert batcher.dropped == 0
+
+
+def test_enqueue_after_stop_is_dropped():
+    collection = FakeCollection()
+    batcher = server.AsyncRoomBatcher(collection)
+
+    async def run():
+        await batcher.start()
+        await batcher.stop()
+        assert not batcher.enqueue({'n': 1})
+
+    asyncio.run(run())
+    assert collection.batches == []
+
+
+def test_submit_after_stop_raises():
+    batcher = server.AsyncRoomBatcher(FakeCollection())
+
+    async def run():
+        await batcher.start()
+        await batcher.stop()
+        await batcher.submit({'n': 1})
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+import server
+
+from .fakes import FakeServer
+
+
+def full_queue(*messages):
+    queue = asyncio.Queue(maxsize=len(messages))
+    for message in messages:
+        queue.put_nowait(message)
+    return queue
+
+
+def drain(queue):
+    messages = []
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+
+@pytest.fixture
+def fake_sio(monkeypatch):
+    sio = FakeServer({'room': ['a', 'b', 'c']})
+    monkeypatch.setattr(server, 'sio', sio)
+    monkeypatch.setattr(server, 'redis_client', None)
+    monkeypatch.setattr(server, 'encode_event', lambda event, payload: f'{event}:{payload}')
+    monkeypatch.setattr(server, 'out_queues', {})
+    monkeypatch.setattr(server, 'out_writers', {})
+    return sio
+
+
+def test_enqueue_with_space():
+    queue = asyncio.Queue(maxsize=2)
+    assert server._enqueue(queue, 'user_joined', 'frame')
+    assert drain(queue) == [('user_joined', 'frame')]
+
+
+def test_full_queue_replaces_oldest_ice_candidate():
+    queue = full_queue(
+        ('webrtc_offer', 'offer'),
+        ('webrtc_ice_candidate', 'c1'),
+        ('webrtc_ice_candidate', 'c2'),
+    )
+    assert server._enqueue(queue, 'webrtc_ice_candidate', 'c3')
+    assert drain(queue) == [
+        ('webrtc_offer', 'offer'),
+        ('webrtc_ice_candidate', 'c2'),
+        ('webrtc_ice_candidate', 'c3'),
+    ]
+
+
+def test_full_queue_without_candidates_rejects_candidate():
+    queue = full_queue(('webrtc_offer', 'offer'), ('user_joined', 'joined'))
+    assert not server._enqueue(queue, 'webrtc_ice_candidate', 'c1')
+    assert drain(queue) == [('webrtc_offer', 'offer'), ('user_joined', 'joined')]
+
+
+def test_full_queue_rejects_other_events():
+    queue = full_queue(('webrtc_ice_candidate', 'c1'), ('webrtc_ice_candidate', 'c2'))
+    assert not server._enqueue(queue, 'webrtc_offer', 'offer')
+    assert drain(queue) == [('webrtc_ice_candidate', 'c1'), ('webrtc_ice_candidate', 'c2')]
+
+
+def test_drop_oldest_keeps_order():
+    queue = full_queue(('a', 1), ('b', 2), ('a', 3), ('c', 4))
+    assert server._drop_oldest(queue, 'a')
+    assert drain(queue) == [('b', 2), ('a', 3), ('c', 4)]
+
+
+def test_drop_oldest_without_match():
+    queue = full_queue(('a', 1))
+    assert not server._drop_oldest(queue, 'b')
+    assert drain(queue) == [('a', 1)]
+
+
+def test_emit_to_disconnects_client_with_full_queue(fake_sio):
+    server.out_queues['a'] = full_queue(('webrtc_offer', 'offer'))
+    asyncio.run(server.emit_to('a', 'user_joined', {}))
+    assert fake_sio.disconnected == ['a']
+    assert 'a' not in server.out_queues
+
+
+def test_emit_to_keeps_client_when_candidate_replaced(fake_sio):
+    server.out_queues['a'] = full_queue(('webrtc_ice_candidate', 'c1'))
+    asyncio.run(server.emit_to('a', 'webrtc_ice_candidate', {}))
+    assert fake_sio.disconnected == []
+    assert drain(server.out_queues['a']) == [('webrtc_ice_candidate', 'webrtc_ice_candidate:{}')]
+
+
+def test_broadcast_drops_only_slow_clients(fake_sio):
+    server.out_queues['a'] = full_queue(('webrtc_offer', 'offer'))
+    server.out_queues['b'] = asyncio.Queue(maxsize=1)
+    asyncio.run(server.broadcast('room', 'user_left', {}))
+    assert fake_sio.disconnected == ['a']
+    assert drain(server.out_queues['b']) == [('user_left', 'user_left:{}')]
+
+
+def test_broadcast_skips_sender(fake_sio):
+    server.out_queues['a'] = asyncio.Queue(maxsize=1)
+    server.out_queues['b'] = asyncio.Queue(maxsize=1)
+    asyncio.run(server.broadcast('room', 'user_left', {}, skip_sid='a'))
+    assert server.out_queues['a'].empty()
+    assert server.out_queues['b'].qsize() == 1
+
+
+def test_deliver_local_skips_a_list_of_sids(fake_sio):
+    for sid in ('a', 'b', 'c'):
+        server.out_queues[sid] = asyncio.Queue(maxsize=1)
+    asyncio.run(server.deliver_local('room', 'user_left', {}, skip_sid=['a', 'c']))
+    assert server.out_queues['a'].empty()
+    assert server.out_queues['c'].empty()
+    assert drain(server.out_queues['b']) == [('user_left', 'user_left:{}')]
+
+
+def pubsub_message(host_id, skip_sid=None):
+    return {
+        'method': 'emit', 'event': 'user_left', 'data': {}, 'namespace': '/',
+        'room': 'room', 'skip_sid': skip_sid, 'callback': None, 'host_id': host_id
+    }
+
+
+def redis_manager(host_id):
+    # Skip __init__, which would set up a Redis connection
+    manager = server.QueuedRedisManager.__new__(server.QueuedRedisManager)
+    manager.host_id = host_id
+    return manager
+
+
+def test_redis_manager_queues_events_from_other_workers(fake_sio):
+    server.out_queues['a'] = asyncio.Queue(maxsize=1)
+    server.out_queues['b'] = asyncio.Queue(maxsize=1)
+    manager = redis_manager('here')
+    asyncio.run(manager._handle_emit(pubsub_message('elsewhere', skip_sid=['a'])))
+    assert server.out_queues['a'].empty()
+    assert drain(server.out_queues['b']) == [('user_left', 'user_left:{}')]
+
+
+def test_redis_manager_ignores_its_own_events(fake_sio):
+    server.out_queues['a'] = asyncio.Queue(maxsize=1)
+    manager = redis_manager('here')
+    asyncio.run(manager._handle_emit(pubsub_message('here')))
+    # broadcast already queued these locally before publishing
+    assert server.out_queues['a'].empty()
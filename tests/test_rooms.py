@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+import server
+
+from .fakes import FakeServer
+
+
+class FakeBatcher:
+    def __init__(self):
+        self.documents = []
+
+    def enqueue(self, document):
+        self.documents.append(document)
+        return True
+
+
+@pytest.fixture
+def fake_sio(monkeypatch):
+    sio = FakeServer()
+    monkeypatch.setattr(server, 'sio', sio)
+    monkeypatch.setattr(server, 'redis_client', None)
+    monkeypatch.setattr(server, 'sid_meta', {})
+    monkeypatch.setattr(server, 'out_queues', {})
+    monkeypatch.setattr(server, 'event_batcher', FakeBatcher())
+    monkeypatch.setattr(server, 'encode_event', lambda event, payload: (event, payload))
+    return sio
+
+
+def events(sid):
+    queue = server.out_queues[sid]
+    messages = []
+    while not queue.empty():
+        messages.append(queue.get_nowait()[1])
+    return messages
+
+
+def test_moving_rooms_leaves_the_old_room(fake_sio):
+    async def run():
+        for sid in ('a', 'b', 'c'):
+            server.out_queues[sid] = asyncio.Queue(maxsize=16)
+        await server.join_room('a', {'room_id': 'r1', 'user_name': 'A'})
+        await server.join_room('b', {'room_id': 'r1', 'user_name': 'B'})
+        await server.join_room('c', {'room_id': 'r2', 'user_name': 'C'})
+        for sid in ('a', 'b', 'c'):
+            events(sid)
+
+        await server.join_room('b', {'room_id': 'r2', 'user_name': 'B'})
+        await server.start_screen_share('a', {})
+
+    asyncio.run(run())
+    assert fake_sio.manager.rooms['/'] == {'r1': ['a'], 'r2': ['c', 'b']}
+    assert events('a') == [('user_left', {'user_id': 'b'})]
+    # b no longer hears from r1, only its own join of r2
+    assert [event for event, _ in events('b')] == ['room_joined']
+    assert events('c') == [('user_joined', {'user_id': 'b', 'user_name': 'B'})]
+    assert [(d['event'], d['room_id']) for d in server.event_batcher.documents][-2:] == [
+        ('leave', 'r1'), ('join', 'r2')
+    ]
+
+
+def test_rejoining_the_same_room_stays(fake_sio):
+    async def run():
+        server.out_queues['a'] = asyncio.Queue(maxsize=16)
+        server.out_queues['b'] = asyncio.Queue(maxsize=16)
+        await server.join_room('a', {'room_id': 'r1', 'user_name': 'A'})
+        await server.join_room('b', {'room_id': 'r1', 'user_name': 'B'})
+        events('a')
+        await server.join_room('b', {'room_id': 'r1', 'user_name': 'B'})
+
+    asyncio.run(run())
+    assert fake_sio.manager.rooms['/'] == {'r1': ['a', 'b']}
+    assert [event for event, _ in events('a')] == ['user_joined']
@@ -0,0 +1,66 @@
+import pytest
+
+import server
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(server.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_get_returns_value_until_ttl(clock):
+    cache = server.TTLCache(ttl=2)
+    cache.set('room', {'id': 'room'})
+    clock[0] += 2
+    assert cache.get('room') == {'id': 'room'}
+    clock[0] += 0.1
+    assert cache.get('room') is None
+
+
+def test_expired_entries_are_removed(clock):
+    cache = server.TTLCache(ttl=1)
+    cache.set('room', 1)
+    clock[0] += 5
+    cache.get('room')
+    assert 'room' not in cache._entries
+
+
+def test_set_refreshes_expiry(clock):
+    cache = server.TTLCache(ttl=2)
+    cache.set('room', 1)
+    clock[0] += 1.5
+    cache.set('room', 2)
+    clock[0] += 1.5
+    assert cache.get('room') == 2
+
+
+def test_missing_key():
+    assert server.TTLCache(ttl=1).get('room') is None
+
+
+def test_oldest_entry_evicted_when_full(clock):
+    cache = server.TTLCache(ttl=10, maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.set('c', 3)
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+    assert cache.get('c') == 3
+
+
+def test_overwrite_when_full_does_not_evict(clock):
+    cache = server.TTLCache(ttl=10, maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.set('a', 3)
+    assert cache.get('a') == 3
+    assert cache.get('b') == 2
+
+
+def test_clear(clock):
+    cache = server.TTLCache(ttl=10)
+    cache.set('a', 1)
+    cache.clear()
+    assert cache.get('a') is None
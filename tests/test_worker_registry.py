@@ -0,0 +1,87 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+import server
+
+from .fakes import FakeServer
+
+
+@pytest.fixture
+def fake_sio(monkeypatch):
+    sio = FakeServer({'r1': ['a', 'b']}, host_id='here')
+    monkeypatch.setattr(server, 'sio', sio)
+    monkeypatch.setattr(server, 'sid_meta', {})
+    monkeypatch.setattr(server, 'out_queues', {})
+    return sio
+
+
+def run_with_redis(monkeypatch, scenario):
+    async def run():
+        redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        monkeypatch.setattr(server, 'redis_client', redis)
+        return await scenario(redis)
+    return asyncio.run(run())
+
+
+def test_purged_worker_restores_its_participants(fake_sio, monkeypatch):
+    async def scenario(redis):
+        await server.add_participant('a', server.ParticipantMeta(room_id='r1', name='A'))
+        await server.add_participant('b', server.ParticipantMeta(room_id='r1', name='B'))
+        await server.heartbeat(registered=False)
+
+        # The heartbeat lapses and another worker reaps this one
+        await redis.delete(server.worker_key('here'))
+        await server.purge_worker('here')
+        assert await redis.hgetall(server.room_key('r1')) == {}
+
+        await server.heartbeat(registered=True)
+        return (
+            await redis.hgetall(server.room_key('r1')),
+            await redis.hgetall(server.USER_ROOMS_KEY),
+            await redis.smembers(server.worker_sids_key('here')),
+            await redis.smembers(server.WORKERS_KEY),
+        )
+
+    room, user_rooms, worker_sids, workers = run_with_redis(monkeypatch, scenario)
+    assert set(room) == {'a', 'b'}
+    assert user_rooms == {'a': 'r1', 'b': 'r1'}
+    assert worker_sids == {'a', 'b'}
+    assert workers == {'here'}
+    assert [event for event, _, _ in fake_sio.emitted] == [
+        'user_left', 'user_left', 'user_joined', 'user_joined'
+    ]
+
+
+def test_registered_worker_does_not_republish(fake_sio, monkeypatch):
+    async def scenario(redis):
+        await server.add_participant('a', server.ParticipantMeta(room_id='r1', name='A'))
+        await server.heartbeat(registered=False)
+        await server.heartbeat(registered=True)
+
+    run_with_redis(monkeypatch, scenario)
+    assert fake_sio.emitted == []
+
+
+def test_heartbeat_purges_only_expired_workers(fake_sio, monkeypatch):
+    async def scenario(redis):
+        for host_id, sid in (('gone', 'x'), ('alive', 'y')):
+            await redis.sadd(server.WORKERS_KEY, host_id)
+            await redis.sadd(server.worker_sids_key(host_id), sid)
+            await redis.hset(server.USER_ROOMS_KEY, sid, 'r1')
+            await redis.hset(server.room_key('r1'), sid, '{}')
+        await redis.set(server.worker_key('alive'), 1)
+
+        await server.heartbeat(registered=False)
+        return (
+            await redis.hgetall(server.room_key('r1')),
+            await redis.smembers(server.WORKERS_KEY),
+            await redis.exists(server.worker_sids_key('gone')),
+        )
+
+    room, workers, gone_sids = run_with_redis(monkeypatch, scenario)
+    assert set(room) == {'y'}
+    assert workers == {'alive', 'here'}
+    assert not gone_sids
+    assert fake_sio.emitted == [('user_left', {'user_id': 'x'}, 'r1')]